@@ -2,13 +2,22 @@
 # File: streamlit_app.py
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from databricks import sql
-import uuid
-from datetime import datetime
+import secrets
+from itertools import chain
 import plotly.express as px
 import plotly.graph_objects as go
 import time
+import queue
+import re
+import threading
+import urllib.request
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # ============================================================================
 # PAGE CONFIG
@@ -25,168 +34,296 @@ st.set_page_config(
 # DATABRICKS CONNECTION
 # ============================================================================
 
-@st.cache_resource
 def get_databricks_connection():
-    """Create cached Databricks connection"""
+    """Open a new Databricks connection"""
+    return sql.connect(
+        server_hostname=st.secrets["databricks"]["host"],
+        http_path=st.secrets["databricks"]["http_path"],
+        access_token=st.secrets["databricks"]["token"]
+    )
+
+# Pooled connections idle for longer than this are checked before reuse,
+# since the warehouse may have closed their session in the meantime
+POOL_IDLE_CHECK_SECONDS = 300
+
+# How long a query waits for a free connection when all are in use
+POOL_TIMEOUT_SECONDS = 30
+
+@st.cache_resource
+def get_connection_pool():
+    """Create cached pool of Databricks connections shared by all sessions"""
+    pool_size = st.secrets["databricks"].get("pool_size", 5)
+    max_overflow = st.secrets["databricks"].get("max_overflow", 5)
+    # The queue holds idle connections (with when they were returned); the
+    # semaphore caps how many connections are open at once
+    return (
+        queue.LifoQueue(maxsize=pool_size),
+        threading.BoundedSemaphore(pool_size + max_overflow)
+    )
+
+def checkout_connection(pool):
+    """Take an idle connection from the pool, or open a new one"""
     try:
-        connection = sql.connect(
-            server_hostname=st.secrets["databricks"]["host"],
-            http_path=st.secrets["databricks"]["http_path"],
-            access_token=st.secrets["databricks"]["token"]
-        )
-        return connection
-    except Exception as e:
-        st.error(f"Connection failed: {e}")
-        return None
+        connection, returned_at = pool.get_nowait()
+    except queue.Empty:
+        return get_databricks_connection()
+    
+    if time.monotonic() - returned_at > POOL_IDLE_CHECK_SECONDS:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            # Stale session; replace it rather than failing the caller's query
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return get_databricks_connection()
+    
+    return connection
+
+@contextmanager
+def databricks_cursor():
+    """Borrow a pooled Databricks connection and yield a cursor on it"""
+    pool, slots = get_connection_pool()
+    if not slots.acquire(timeout=POOL_TIMEOUT_SECONDS):
+        raise TimeoutError("Timed out waiting for a free Databricks connection")
+    
+    try:
+        connection = checkout_connection(pool)
+        
+        try:
+            with connection.cursor() as cursor:
+                yield cursor
+        except Exception:
+            # The connection may be broken, so don't hand it to the next caller
+            connection.close()
+            raise
+        
+        try:
+            pool.put_nowait((connection, time.monotonic()))
+        except queue.Full:
+            connection.close()
+    finally:
+        slots.release()
 
 # ============================================================================
 # DATA OPERATIONS
 # ============================================================================
 
-def submit_financial_data(business_unit, revenue, expenses, submitted_by):
-    """Submit financial data to Databricks"""
-    connection = get_databricks_connection()
-    if not connection:
-        return False, "Connection failed"
-    
+# Databricks SQL caps a single statement at 256 bound parameters
+MAX_QUERY_PARAMS = 256
+
+# Columns bound per row; the timestamps are filled in server-side
+INSERT_COLUMNS = ("submission_id", "business_unit", "revenue", "expenses", "submitted_by")
+TIMESTAMP_COLUMNS = ("submission_date", "created_at")
+
+@st.cache_data(ttl=600, show_spinner=False)
+def profit_margin_is_generated():
+    """Check whether profit_margin is a Delta generated column"""
+    # Tables created with the older README DDL have a plain profit_margin
+    # column, which the app still has to fill in itself
+    with databricks_cursor() as cursor:
+        cursor.execute("SHOW CREATE TABLE financial_submissions")
+        statement = cursor.fetchone()[0]
+    return re.search(
+        r"\bprofit_margin`?\s+\w+(?:\([^)]*\))?[^,]*?GENERATED\s+ALWAYS\s+AS", statement, re.IGNORECASE
+    ) is not None
+
+def submit_financial_data_bulk(rows):
+    """Submit (business_unit, revenue, expenses, submitted_by) rows to Databricks"""
     try:
-        cursor = connection.cursor()
-        
-        submission_id = f"sub_{uuid.uuid4().hex[:8]}"
-        profit_margin = ((revenue - expenses) / revenue * 100) if revenue > 0 else 0
-        
-        query = """
-        INSERT INTO financial_submissions 
-        (submission_id, business_unit, submission_date, revenue, expenses, 
-         profit_margin, submitted_by, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        cursor.execute(query, (
-            submission_id,
-            business_unit,
-            datetime.now(),
-            float(revenue),
-            float(expenses),
-            float(profit_margin),
-            submitted_by,
-            datetime.now()
-        ))
-        
-        cursor.close()
-        return True, submission_id
+        columns = INSERT_COLUMNS
+        bind_margin = not profit_margin_is_generated()
+        if bind_margin:
+            columns += ("profit_margin",)
+        
+        submission_ids = []
+        params = []
+        for business_unit, revenue, expenses, submitted_by in rows:
+            submission_id = f"sub_{secrets.token_hex(4)}"
+            submission_ids.append(submission_id)
+            row = (
+                submission_id,
+                business_unit,
+                float(revenue),
+                float(expenses),
+                submitted_by
+            )
+            if bind_margin:
+                profit_margin = ((revenue - expenses) / revenue * 100) if revenue > 0 else 0
+                row += (float(profit_margin),)
+            params.append(row)
+        
+        # One multi-row INSERT per chunk instead of one round trip per row
+        chunk_size = MAX_QUERY_PARAMS // len(columns)
+        placeholder = "(" + ", ".join(
+            ["?"] * len(columns) + ["CURRENT_TIMESTAMP()"] * len(TIMESTAMP_COLUMNS)
+        ) + ")"
+        # The connector has no prepare API; the INSERT text depends only on
+        # the chunk size, so repeated submissions send identical SQL
+        with databricks_cursor() as cursor:
+            for start in range(0, len(params), chunk_size):
+                chunk = params[start:start + chunk_size]
+                query = f"""
+                INSERT INTO financial_submissions 
+                ({", ".join(columns + TIMESTAMP_COLUMNS)})
+                VALUES {", ".join([placeholder] * len(chunk))}
+                """
+                cursor.execute(query, list(chain.from_iterable(chunk)))
+        
+        return True, submission_ids
         
     except Exception as e:
         return False, str(e)
 
-@st.cache_data(ttl=30)
-def fetch_all_data(_timezone='America/New_York'):
-    """Fetch all financial data"""
-    connection = get_databricks_connection()
-    if not connection:
-        return pd.DataFrame()
-    
+def submit_financial_data(business_unit, revenue, expenses, submitted_by):
+    """Submit financial data to Databricks"""
+    success, result = submit_financial_data_bulk(
+        [(business_unit, revenue, expenses, submitted_by)]
+    )
+    return success, result[0] if success else result
+
+def arrow_to_pandas(table):
+    """Convert an Arrow result set to pandas with native numeric dtypes"""
+    # DECIMAL columns would otherwise land as object dtype holding Decimals,
+    # which Plotly can't scale; cast them to float64 while still in Arrow
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), pa.float64()))
+    return table.to_pandas()
+
+def get_data_version():
+    """Get the latest Delta commit (version, timestamp), used as the cache key for reads"""
+    # Every write commits a new Delta version, so cached reads stay valid
+    # until someone (in any session) actually changes the table. The commit
+    # timestamp is included because versions restart at 0 if the table is
+    # recreated
     try:
-        cursor = connection.cursor()
-        cursor.execute("""
-            SELECT * FROM financial_submissions 
+        with databricks_cursor() as cursor:
+            cursor.execute("DESCRIBE HISTORY financial_submissions LIMIT 1")
+            row = cursor.fetchone()
+            return row.version, row.timestamp
+    except Exception as e:
+        # Fall back to a 30-second bucket so reads still refresh periodically
+        st.warning(f"Couldn't read the table version, refreshing every 30 seconds instead: {e}")
+        return f"ttl-{int(time.time() // 30)}"
+
+# Cached reads raise on failure rather than returning an empty frame, so an
+# error is never cached against a data version
+@st.cache_data(max_entries=50, show_spinner=False)
+def fetch_recent(version, timezone='America/New_York', n=10):
+    """Fetch the most recent submissions for display"""
+    with databricks_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT business_unit, revenue, expenses, profit_margin,
+                   submitted_by, submission_date
+            FROM financial_submissions 
             ORDER BY submission_date DESC 
-            LIMIT 100
+            LIMIT {int(n)}
         """)
-        
-        columns = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        
-        df = pd.DataFrame(data, columns=columns)
-        
-        # Convert data types for Plotly compatibility
-        if not df.empty:
-            df['revenue'] = pd.to_numeric(df['revenue'], errors='coerce')
-            df['expenses'] = pd.to_numeric(df['expenses'], errors='coerce')
-            df['profit_margin'] = pd.to_numeric(df['profit_margin'], errors='coerce')
-            
-            # Convert timestamps to user's selected timezone
-            # Handle both tz-aware and tz-naive timestamps
-            if 'submission_date' in df.columns:
-                df['submission_date'] = pd.to_datetime(df['submission_date'])
-                if df['submission_date'].dt.tz is None:
-                    # If timezone-naive, assume UTC
-                    df['submission_date'] = df['submission_date'].dt.tz_localize('UTC')
-                # Convert to user's timezone
-                df['submission_date'] = df['submission_date'].dt.tz_convert(_timezone)
-                
-            if 'created_at' in df.columns:
-                df['created_at'] = pd.to_datetime(df['created_at'])
-                if df['created_at'].dt.tz is None:
-                    # If timezone-naive, assume UTC
-                    df['created_at'] = df['created_at'].dt.tz_localize('UTC')
-                # Convert to user's timezone
-                df['created_at'] = df['created_at'].dt.tz_convert(_timezone)
-        
-        cursor.close()
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"Fetch failed: {e}")
-        return pd.DataFrame()
+        df = arrow_to_pandas(cursor.fetchall_arrow())
+    
+    if not df.empty:
+        # Convert timestamps to user's selected timezone
+        # Handle both tz-aware and tz-naive timestamps
+        df['submission_date'] = pd.to_datetime(df['submission_date'])
+        if df['submission_date'].dt.tz is None:
+            # If timezone-naive, assume UTC
+            df['submission_date'] = df['submission_date'].dt.tz_localize('UTC')
+        # Convert to user's timezone
+        df['submission_date'] = df['submission_date'].dt.tz_convert(timezone)
+    
+    return df
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def fetch_for_scatter(version, sample_rows=1000):
+    """Fetch a random sample of submissions for the row-level charts"""
+    # Sample server-side so the chart payload stays bounded as the table
+    # grows. TABLESAMPLE (n ROWS) is a plain LIMIT on Databricks and would
+    # keep returning the same rows, so shuffle with rand() before limiting
+    with databricks_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT business_unit, revenue, expenses, profit_margin
+            FROM financial_submissions
+            ORDER BY rand()
+            LIMIT {int(sample_rows)}
+        """)
+        return arrow_to_pandas(cursor.fetchall_arrow())
 
-@st.cache_data(ttl=30)
-def get_summary_stats():
-    """Get summary statistics"""
-    connection = get_databricks_connection()
-    if not connection:
-        return pd.DataFrame()
+@st.cache_data(max_entries=50, show_spinner=False)
+def get_summary_stats(version):
+    """Get per-business-unit summary statistics and grand totals"""
+    # ROLLUP adds a grand-total row so the KPIs cover the whole table
+    # without a second query or a client-side aggregation
+    query = """
+    SELECT 
+        business_unit,
+        GROUPING(business_unit) as is_total,
+        COUNT(*) as submission_count,
+        SUM(revenue) as total_revenue,
+        SUM(expenses) as total_expenses,
+        AVG(profit_margin) as avg_profit_margin
+    FROM financial_submissions
+    GROUP BY ROLLUP(business_unit)
+    ORDER BY total_revenue DESC
+    """
     
-    try:
-        cursor = connection.cursor()
-        query = """
-        SELECT 
-            business_unit,
-            COUNT(*) as submission_count,
-            SUM(revenue) as total_revenue,
-            SUM(expenses) as total_expenses,
-            AVG(profit_margin) as avg_profit_margin
-        FROM financial_submissions
-        GROUP BY business_unit
-        ORDER BY total_revenue DESC
-        """
-        
+    with databricks_cursor() as cursor:
         cursor.execute(query)
-        columns = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        
-        df = pd.DataFrame(data, columns=columns)
-        
-        # Convert data types for Plotly compatibility
-        if not df.empty:
-            df['submission_count'] = pd.to_numeric(df['submission_count'], errors='coerce')
-            df['total_revenue'] = pd.to_numeric(df['total_revenue'], errors='coerce')
-            df['total_expenses'] = pd.to_numeric(df['total_expenses'], errors='coerce')
-            df['avg_profit_margin'] = pd.to_numeric(df['avg_profit_margin'], errors='coerce')
-        
-        cursor.close()
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"Summary fetch failed: {e}")
-        return pd.DataFrame()
+        table = cursor.fetchall_arrow()
+    
+    # Split the grand-total row off in Arrow and read the KPIs straight from
+    # it; only the per-unit rows are converted to pandas for the charts
+    is_total = pc.equal(table['is_total'], 1)
+    total_row = table.filter(is_total)
+    totals = {}
+    if total_row.num_rows and total_row['submission_count'][0].as_py() > 0:
+        totals = {
+            name: total_row[name][0].as_py()
+            for name in ('submission_count', 'total_revenue', 'total_expenses', 'avg_profit_margin')
+        }
+    summary_df = arrow_to_pandas(table.filter(pc.invert(is_total)).drop_columns(['is_total']))
+    
+    return summary_df, totals
 
 # ============================================================================
 # UI COMPONENTS
 # ============================================================================
 
+LOGO_URL = "https://www.databricks.com/wp-content/uploads/2021/10/db-nav-logo.svg"
+
+@st.cache_resource(ttl=3600)
+def get_logo():
+    """Download the Databricks logo, falling back to its URL"""
+    # The fallback is cached too, so without network access the sidebar
+    # doesn't block on the download timeout every rerun; the browser
+    # fetches the URL instead, and the download is retried after the TTL
+    try:
+        with urllib.request.urlopen(LOGO_URL, timeout=5) as response:
+            return response.read().decode("utf-8")
+    except Exception:
+        return LOGO_URL
+
 def show_header():
     """Display header section"""
     st.title("💰 Financial Data Submission Portal")
     st.markdown("---")
 
+@st.fragment
 def show_data_entry_form():
     """Display data entry form"""
+    # As a fragment, input changes rerun only this block (keeping the margin
+    # preview live) instead of the whole dashboard
     st.header("📝 Submit Financial Data")
     
-    with st.form("financial_form", clear_on_submit=True):
+    # Confirmation for a submission made just before the last full rerun
+    submission_id = st.session_state.pop('last_submission_id', None)
+    if submission_id:
+        st.success(f"✅ Data submitted successfully! ID: {submission_id}")
+        st.balloons()
+    
+    with st.container(border=True):
         col1, col2 = st.columns(2)
         
         with col1:
@@ -222,7 +359,7 @@ def show_data_entry_form():
             profit_margin = ((revenue - expenses) / revenue * 100)
             st.info(f"💡 Profit Margin Preview: {profit_margin:.2f}%")
         
-        submitted = st.form_submit_button("Submit Data", use_container_width=True)
+        submitted = st.button("Submit Data", use_container_width=True)
         
         if submitted:
             with st.spinner("Submitting data..."):
@@ -231,21 +368,20 @@ def show_data_entry_form():
                 )
                 
                 if success:
-                    st.success(f"✅ Data submitted successfully! ID: {result}")
-                    st.balloons()
-                    # Clear cache to force fresh data fetch
-                    fetch_all_data.clear()
-                    get_summary_stats.clear()
-                    # Small delay to ensure Databricks commits the data
-                    import time
-                    time.sleep(1)
+                    # The dashboard lives outside this fragment, so one full
+                    # rerun is needed to show the new data; the confirmation
+                    # is rendered by that rerun so it isn't wiped out. No
+                    # cache clearing or commit delay is needed: the INSERT has
+                    # committed when it returns, bumping the Delta version
+                    # that every read is keyed on
+                    st.session_state['last_submission_id'] = result
                     st.rerun()
                 else:
                     st.error(f"❌ Submission failed: {result}")
 
-def show_kpi_metrics(df):
+def show_kpi_metrics(totals):
     """Display KPI metrics"""
-    if df.empty:
+    if not totals:
         st.warning("No data available")
         return
     
@@ -254,38 +390,120 @@ def show_kpi_metrics(df):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_revenue = df['revenue'].sum()
         st.metric(
             "Total Revenue",
-            f"${total_revenue:,.0f}",
+            f"${totals['total_revenue']:,.0f}",
             delta=None
         )
     
     with col2:
-        total_expenses = df['expenses'].sum()
         st.metric(
             "Total Expenses",
-            f"${total_expenses:,.0f}",
+            f"${totals['total_expenses']:,.0f}",
             delta=None
         )
     
     with col3:
-        avg_margin = df['profit_margin'].mean()
         st.metric(
             "Avg Profit Margin",
-            f"{avg_margin:.1f}%",
+            # NULL when no row has a margin (e.g. an all-NULL legacy column)
+            f"{totals['avg_profit_margin']:.1f}%" if totals['avg_profit_margin'] is not None else "N/A",
             delta=None
         )
     
     with col4:
-        submission_count = len(df)
         st.metric(
             "Total Submissions",
-            submission_count,
+            int(totals['submission_count']),
             delta=None
         )
 
-def show_visualizations(df, summary_df):
+# Keyed on the data version only: the frames are themselves cached on it,
+# so the underscore-prefixed arguments don't need hashing. Only the current
+# version is ever rendered, so keep just a few entries around
+@st.cache_data(max_entries=5, show_spinner=False)
+def build_figures(version, _df, _summary_df):
+    """Build the dashboard's Plotly figures"""
+    df, summary_df = _df, _summary_df
+    
+    # Revenue by Business Unit
+    revenue_by_unit = px.bar(
+        summary_df,
+        x='business_unit',
+        y='total_revenue',
+        title='Total Revenue by Business Unit',
+        labels={'total_revenue': 'Revenue ($)', 'business_unit': 'Business Unit'},
+        color='total_revenue',
+        color_continuous_scale='Blues'
+    )
+    revenue_by_unit.update_layout(showlegend=False)
+    
+    # Expenses vs Revenue Scatter
+    # Use absolute value for size to handle negative profit margins;
+    # passed as a Series so the whole frame isn't copied to add it
+    expenses_vs_revenue = px.scatter(
+        df,
+        x='revenue',
+        y='expenses',
+        color='business_unit',
+        title='Expenses vs Revenue',
+        labels={'revenue': 'Revenue ($)', 'expenses': 'Expenses ($)'},
+        size=df['profit_margin'].abs().rename('abs_profit_margin'),
+        custom_data=['business_unit', 'profit_margin'],
+        render_mode='webgl'
+    )
+    expenses_vs_revenue.update_traces(
+        hovertemplate=(
+            "<b>%{customdata[0]}</b><br>"
+            "Revenue: $%{x:,.2f}<br>"
+            "Expenses: $%{y:,.2f}<br>"
+            "Profit Margin: %{customdata[1]:.2f}%"
+            "<extra></extra>"
+        )
+    )
+    
+    # Profit Margin by Unit
+    margin_by_unit = px.bar(
+        summary_df,
+        x='avg_profit_margin',
+        y='business_unit',
+        orientation='h',
+        title='Average Profit Margin by Business Unit',
+        labels={'avg_profit_margin': 'Profit Margin (%)', 'business_unit': 'Business Unit'},
+        color='avg_profit_margin',
+        color_continuous_scale='Greens'
+    )
+    margin_by_unit.update_layout(showlegend=False)
+    
+    # Profit Margin Distribution
+    margin_distribution = px.box(
+        df,
+        x='business_unit',
+        y='profit_margin',
+        title='Profit Margin Distribution',
+        labels={'profit_margin': 'Profit Margin (%)', 'business_unit': 'Business Unit'},
+        color='business_unit'
+    )
+    margin_distribution.update_layout(showlegend=False)
+    
+    # Submission Count Pie Chart
+    submissions_by_unit = px.pie(
+        summary_df,
+        values='submission_count',
+        names='business_unit',
+        title='Submissions by Business Unit',
+        hole=0.4
+    )
+    
+    return {
+        'revenue_by_unit': revenue_by_unit,
+        'expenses_vs_revenue': expenses_vs_revenue,
+        'margin_by_unit': margin_by_unit,
+        'margin_distribution': margin_distribution,
+        'submissions_by_unit': submissions_by_unit
+    }
+
+def show_visualizations(df, summary_df, version):
     """Display data visualizations"""
     if df.empty or summary_df.empty:
         st.info("Submit data to see visualizations")
@@ -293,96 +511,47 @@ def show_visualizations(df, summary_df):
     
     st.header("📈 Data Visualizations")
     
+    figures = build_figures(version, df, summary_df)
+    
     tab1, tab2, tab3 = st.tabs(["Revenue Analysis", "Profit Margins", "Business Units"])
     
     with tab1:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Revenue by Business Unit
-            fig1 = px.bar(
-                summary_df,
-                x='business_unit',
-                y='total_revenue',
-                title='Total Revenue by Business Unit',
-                labels={'total_revenue': 'Revenue ($)', 'business_unit': 'Business Unit'},
-                color='total_revenue',
-                color_continuous_scale='Blues'
-            )
-            fig1.update_layout(showlegend=False)
-            st.plotly_chart(fig1, use_container_width=True)
+            st.plotly_chart(figures['revenue_by_unit'], use_container_width=True)
         
         with col2:
-            # Expenses vs Revenue Scatter
-            # Use absolute value for size to handle negative profit margins
-            df_viz = df.copy()
-            df_viz['abs_profit_margin'] = df_viz['profit_margin'].abs()
-            
-            fig2 = px.scatter(
-                df_viz,
-                x='revenue',
-                y='expenses',
-                color='business_unit',
-                title='Expenses vs Revenue',
-                labels={'revenue': 'Revenue ($)', 'expenses': 'Expenses ($)'},
-                size='abs_profit_margin',
-                hover_data=['business_unit', 'profit_margin']
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(figures['expenses_vs_revenue'], use_container_width=True)
     
     with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Profit Margin by Unit
-            fig3 = px.bar(
-                summary_df,
-                x='avg_profit_margin',
-                y='business_unit',
-                orientation='h',
-                title='Average Profit Margin by Business Unit',
-                labels={'avg_profit_margin': 'Profit Margin (%)', 'business_unit': 'Business Unit'},
-                color='avg_profit_margin',
-                color_continuous_scale='Greens'
-            )
-            fig3.update_layout(showlegend=False)
-            st.plotly_chart(fig3, use_container_width=True)
+            st.plotly_chart(figures['margin_by_unit'], use_container_width=True)
         
         with col2:
-            # Profit Margin Distribution
-            fig4 = px.box(
-                df,
-                x='business_unit',
-                y='profit_margin',
-                title='Profit Margin Distribution',
-                labels={'profit_margin': 'Profit Margin (%)', 'business_unit': 'Business Unit'},
-                color='business_unit'
-            )
-            fig4.update_layout(showlegend=False)
-            st.plotly_chart(fig4, use_container_width=True)
+            st.plotly_chart(figures['margin_distribution'], use_container_width=True)
     
     with tab3:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Submission Count Pie Chart
-            fig5 = px.pie(
-                summary_df,
-                values='submission_count',
-                names='business_unit',
-                title='Submissions by Business Unit',
-                hole=0.4
-            )
-            st.plotly_chart(fig5, use_container_width=True)
+            st.plotly_chart(figures['submissions_by_unit'], use_container_width=True)
         
         with col2:
             # Summary Table
             st.subheader("Summary Statistics")
-            display_df = summary_df.copy()
-            display_df['total_revenue'] = display_df['total_revenue'].apply(lambda x: f"${x:,.2f}")
-            display_df['total_expenses'] = display_df['total_expenses'].apply(lambda x: f"${x:,.2f}")
-            display_df['avg_profit_margin'] = display_df['avg_profit_margin'].apply(lambda x: f"{x:.2f}%")
-            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            st.dataframe(
+                summary_df,
+                column_config={
+                    'total_revenue': st.column_config.NumberColumn(format="dollar"),
+                    'total_expenses': st.column_config.NumberColumn(format="dollar"),
+                    'avg_profit_margin': st.column_config.NumberColumn(format="%.2f%%")
+                },
+                use_container_width=True,
+                hide_index=True
+            )
 
 def show_recent_submissions(df):
     """Display recent submissions table"""
@@ -391,28 +560,16 @@ def show_recent_submissions(df):
     
     st.header("🕐 Recent Submissions")
     
-    # Format dataframe for display
-    display_df = df.head(10).copy()
-    
-    # Safely format numeric columns
-    display_df['revenue'] = display_df['revenue'].apply(
-        lambda x: f"${float(x):,.2f}" if pd.notna(x) else "$0.00"
-    )
-    display_df['expenses'] = display_df['expenses'].apply(
-        lambda x: f"${float(x):,.2f}" if pd.notna(x) else "$0.00"
-    )
-    display_df['profit_margin'] = display_df['profit_margin'].apply(
-        lambda x: f"{float(x):.2f}%" if pd.notna(x) else "0.00%"
-    )
-    
-    # Format submission date to be more readable
-    if 'submission_date' in display_df.columns:
-        display_df['submission_date'] = display_df['submission_date'].apply(
-            lambda x: x.strftime('%Y-%m-%d %I:%M %p %Z') if pd.notna(x) else ''
-        )
-    
+    # Formatting happens in the browser, so the columns stay numeric (and
+    # sortable) and no per-cell formatting runs in Python
     st.dataframe(
-        display_df[['business_unit', 'revenue', 'expenses', 'profit_margin', 'submitted_by', 'submission_date']],
+        df,
+        column_config={
+            'revenue': st.column_config.NumberColumn(format="dollar"),
+            'expenses': st.column_config.NumberColumn(format="dollar"),
+            'profit_margin': st.column_config.NumberColumn(format="%.2f%%"),
+            'submission_date': st.column_config.DatetimeColumn(format="YYYY-MM-DD hh:mm A")
+        },
         use_container_width=True,
         hide_index=True
     )
@@ -426,7 +583,7 @@ def main():
     
     # Sidebar
     with st.sidebar:
-        st.image("https://www.databricks.com/wp-content/uploads/2021/10/db-nav-logo.svg", width=200)
+        st.image(get_logo(), width=200)
         st.markdown("---")
         st.subheader("About")
         st.write("This demo app showcases financial data submission to Databricks Delta tables with real-time analytics.")
@@ -447,9 +604,9 @@ def main():
         
         st.markdown("---")
         
+        # Rerunning re-reads the table version, so no cache clearing is
+        # needed to pick up new submissions
         if st.button("🔄 Refresh Data", use_container_width=True):
-            fetch_all_data.clear()
-            get_summary_stats.clear()
             st.rerun()
         
         st.markdown("---")
@@ -466,16 +623,43 @@ def main():
     # Fetch data
     timezone = st.session_state.get('timezone', 'America/New_York')
     with st.spinner("Loading data..."):
-        df = fetch_all_data(timezone)
-        summary_df = get_summary_stats()
+        version = get_data_version()
+        
+        # Run the queries concurrently so their round trips overlap; the
+        # worker threads need the script context for caching
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=3, initializer=add_script_run_ctx, initargs=(None, ctx)
+        ) as executor:
+            recent_future = executor.submit(fetch_recent, version, timezone)
+            scatter_future = executor.submit(fetch_for_scatter, version)
+            summary_future = executor.submit(get_summary_stats, version)
+            
+            try:
+                recent_df = recent_future.result()
+            except Exception as e:
+                st.error(f"Fetch failed: {e}")
+                recent_df = pd.DataFrame()
+            
+            try:
+                scatter_df = scatter_future.result()
+            except Exception as e:
+                st.error(f"Fetch failed: {e}")
+                scatter_df = pd.DataFrame()
+            
+            try:
+                summary_df, totals = summary_future.result()
+            except Exception as e:
+                st.error(f"Summary fetch failed: {e}")
+                summary_df, totals = pd.DataFrame(), {}
     
     # Display metrics and visualizations
-    if not df.empty:
-        show_kpi_metrics(df)
+    if not summary_df.empty:
+        show_kpi_metrics(totals)
         st.markdown("---")
-        show_visualizations(df, summary_df)
+        show_visualizations(scatter_df, summary_df, version)
         st.markdown("---")
-        show_recent_submissions(df)
+        show_recent_submissions(recent_df)
     else:
         st.info("👋 Welcome! Submit your first financial data entry above to get started.")
 